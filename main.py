@@ -5,6 +5,8 @@ from kivy.properties import StringProperty, BooleanProperty
 from kivy.uix.screenmanager import ScreenManager, Screen, SwapTransition
 from kivy.core.audio import SoundLoader
 import sqlite3
+import threading
+from collections import deque
 from datetime import datetime
 from kivy.clock import Clock
 from kivy.uix.textinput import TextInput
@@ -14,6 +16,15 @@ from kivymd.uix.button import MDFlatButton
 
 # Window.size = (310, 600)
 
+HISTORY_FIELDS = ('id', 'expression', 'result', 'timestamp_english', 'timestamp_nepali',
+                  'timestamp_limbu', 'repeat_count', 'last_seen')
+HISTORY_COLUMNS = ', '.join(HISTORY_FIELDS)
+RECORD_ID = HISTORY_FIELDS.index('id')
+RECORD_REPEAT_COUNT = HISTORY_FIELDS.index('repeat_count')
+# Newest activity first. seq only ever grows, so the clock can't reorder history
+HISTORY_ORDER = 'seq DESC'
+NEXT_SEQ = '(SELECT COALESCE(MAX(seq), 0) + 1 FROM calu_activity)'
+
 class KeyboardThemeStyle(Screen):
     pass
 
@@ -35,91 +46,230 @@ class NoKeyboardTextInput(TextInput):
             self.focus = False
 
 
+class InputBuffer:
+    """Editable expression held as a list of key tokens with a cursor"""
+
+    def __init__(self, text=""):
+        self.tokens = list(text)
+        self.cursor = len(self.tokens)
+        self._text = text
+
+    @property
+    def text(self):
+        # Only rebuild the string after an edit
+        if self._text is None:
+            self._text = ''.join(self.tokens)
+        return self._text
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def set_text(self, text):
+        self.tokens = list(text)
+        self.cursor = len(self.tokens)
+        self._text = text
+
+    def set_cursor(self, position):
+        self.cursor = max(0, min(position, len(self.tokens)))
+
+    def clear(self):
+        self.set_text("")
+
+    def insert(self, token):
+        self.tokens[self.cursor:self.cursor] = list(token)
+        self.cursor += len(token)
+        self._text = None
+
+    def backspace(self):
+        """Remove the token just before the cursor"""
+        if self.cursor == 0:
+            return False
+        self.cursor -= 1
+        del self.tokens[self.cursor]
+        self._text = None
+        return True
+
+    def delete_first(self):
+        """Remove the first token, keeping the cursor on the same token"""
+        if not self.tokens:
+            return False
+        del self.tokens[0]
+        if self.cursor > 0:
+            self.cursor -= 1
+        self._text = None
+        return True
+
+    def token_before_cursor(self):
+        return self.tokens[self.cursor - 1] if self.cursor > 0 else None
+
+    def replace_before_cursor(self, token):
+        if self.cursor > 0:
+            self.tokens[self.cursor - 1] = token
+            self._text = None
+
+
 class LogScreen(Screen):
     display_limit = 10
     current_offset = 0
     has_more_records = BooleanProperty(False)
     delete_dialog = None
 
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Pages are fetched on worker threads; a bumped generation drops stale results
+        self.load_generation = 0
+        self.pages = {}
+        self.wanted_offset = None
+        self.history_entries = []
+
     def on_pre_enter(self):
         self.current_offset = 0
+        self.ids.log_label.text = "[size=20sp][b]Loading history...[/b][/size]"
         self.load_history()
 
-    def check_more_records(self):
-        """Check if more records exist beyond current offset"""
-        try:
-            conn = sqlite3.connect('kirat_cal.db')
-            cursor = conn.cursor()
-            # Check if records exist beyond current display
-            cursor.execute('SELECT COUNT(*) FROM calu_activity')
-            total_records = cursor.fetchone()[0]
-            conn.close()
-            self.has_more_records = total_records > (self.current_offset + self.display_limit)
-        except Exception as e:
-            print(f"Error checking records: {e}")
-            self.has_more_records = False
+    def on_leave(self):
+        self.cancel_loading()
+
+    def cancel_loading(self):
+        """Forget pending and prefetched pages, results still in flight are dropped"""
+        self.load_generation += 1
+        self.pages = {}
+        self.wanted_offset = None
 
     def load_history(self, load_more=False):
-        try:
-            if load_more:
-                self.current_offset += self.display_limit
-            else:
-                self.current_offset = 0
+        if load_more:
+            self.wanted_offset = self.current_offset + self.display_limit
+        else:
+            self.cancel_loading()
+            self.current_offset = 0
+            self.history_entries = []
+            self.wanted_offset = 0
+            self.page_from_recent()
+
+        self.fetch_page(self.wanted_offset)
+        self.show_ready_pages()
+
+    def page_from_recent(self):
+        """Serve the first page from the main screen's ring buffer when it holds enough rows"""
+        main_screen = self.manager.get_screen('main')
+        page = main_screen.recent_page(self.display_limit)
+        if page is None:
+            return
+        records, has_more = page
+        num_system = main_screen.current_num_system
+        entries = [self.format_record(record, main_screen, num_system) for record in records]
+        self.pages[0] = (entries, has_more)
+
+    def fetch_page(self, offset):
+        """Start loading a page in the background unless it is loaded or loading"""
+        if offset in self.pages:
+            return
+        self.pages[offset] = None
+
+        main_screen = self.manager.get_screen('main')
+        thread = threading.Thread(
+            target=self._fetch_page_worker,
+            args=(self.load_generation, offset, main_screen, main_screen.current_num_system),
+            daemon=True
+        )
+        thread.start()
 
+    def _fetch_page_worker(self, generation, offset, main_screen, num_system):
+        """Runs off the UI thread: query one page and format its entries"""
+        try:
             conn = sqlite3.connect('kirat_cal.db')
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT * FROM calu_activity 
-                ORDER BY id DESC 
+            # One extra row tells us whether another page exists
+            cursor.execute(f'''
+                SELECT {HISTORY_COLUMNS} FROM calu_activity 
+                ORDER BY {HISTORY_ORDER} 
                 LIMIT ? OFFSET ?
-            ''', (self.display_limit, self.current_offset))
+            ''', (self.display_limit + 1, offset))
             records = cursor.fetchall()
             conn.close()
 
-            self.check_more_records()  # Update has_more_records
-
-            if not records and not load_more:
-                self.ids.log_label.text = "[size=20sp][b]No history found[/b][/size]"
-                self.ids.log_label.markup = True
+            if generation != self.load_generation:
                 return
 
-            history_text = "[size=20sp][b]Calculation History:[/b]\n\n" if not load_more else ""
+            has_more = len(records) > self.display_limit
+            entries = [self.format_record(record, main_screen, num_system)
+                       for record in records[:self.display_limit]]
+        except Exception as e:
+            print(f"Error loading history: {e}")
+            Clock.schedule_once(lambda dt: self._on_page_error(generation, offset))
+            return
 
-            if load_more and self.ids.log_label.text:
-                history_text = self.ids.log_label.text + "\n\n"
+        Clock.schedule_once(lambda dt: self._on_page_loaded(generation, offset, entries, has_more))
 
-            for record in records:
-                id, expression, result, ts_eng, ts_nep, ts_lim = record
-                main_screen = self.manager.get_screen('main')
-                num_system = main_screen.current_num_system
+    def format_record(self, record, main_screen, num_system):
+        id, expression, result, ts_eng, ts_nep, ts_lim, repeat_count, last_seen = record
 
-                # Format timestamp
-                timestamp = ts_lim if num_system == "limbu" else ts_nep if num_system == "nepali" else ts_eng
+        # Format timestamp
+        timestamp = ts_lim if num_system == "limbu" else ts_nep if num_system == "nepali" else ts_eng
 
-                # Convert numbers
-                if num_system != "english":
-                    expr_display = main_screen.convert_from_english(expression) if expression else ""
-                    result_display = main_screen.convert_from_english(result) if result else ""
-                else:
-                    expr_display = expression if expression else ""
-                    result_display = result if result else ""
+        # Convert numbers
+        expr_display = main_screen.convert_from_english_system(expression, num_system) if expression else ""
+        result_display = main_screen.convert_from_english_system(result, num_system) if result else ""
 
-                history_text += f"[size=18sp][b]{expr_display} = {result_display}[/b][/size]\n"
-                history_text += f"[size=12sp]{timestamp}[/size]"
-                history_text += f"      [color=ff0000][ref=del_{id}][size=12sp][Delete][/size][/ref][/color]\n\n"
+        entry = f"[size=18sp][b]{expr_display} = {result_display}[/b][/size]\n"
+        entry += f"[size=12sp]{timestamp}[/size]"
+        if repeat_count and repeat_count > 1:
+            count_display = main_screen.convert_from_english_system(str(repeat_count), num_system)
+            seen_display = main_screen.convert_timestamp(last_seen, num_system)
+            entry += f"  [size=12sp][b]Repeated {count_display} times[/b][/size]"
+            entry += f"\n[size=12sp]Last seen {seen_display}[/size]"
+        entry += f"      [color=ff0000][ref=del_{id}][size=12sp][Delete][/size][/ref][/color]\n\n"
+        return entry
 
-            # Add Load More button if more records exist
-            if self.has_more_records:
-                history_text += "[size=18sp][color=0000ff][ref=load_more][Load More...][/ref][/color][/size]"
-            else:
-                history_text += "[size=18sp][color=808080]No more records[/color][/size]"
+    def _on_page_loaded(self, generation, offset, entries, has_more):
+        if generation != self.load_generation:
+            return
+        self.pages[offset] = (entries, has_more)
+        self.show_ready_pages()
 
-            self.ids.log_label.text = history_text
+    def _on_page_error(self, generation, offset):
+        if generation != self.load_generation:
+            return
+        if offset != self.wanted_offset:
+            # A failed prefetch leaves the shown history alone, Load More retries it
+            self.pages.pop(offset, None)
+            return
+        self.cancel_loading()
+        self.ids.log_label.text = "Error loading history"
+
+    def show_ready_pages(self):
+        """Display the wanted page once it has arrived and prefetch the one after it"""
+        offset = self.wanted_offset
+        if offset is None or self.pages.get(offset) is None:
+            return
+
+        entries, has_more = self.pages.pop(offset)
+        self.wanted_offset = None
+        self.current_offset = offset
+        self.has_more_records = has_more
+        self.history_entries.extend(entries)
+        self.render_history()
+
+        if has_more:
+            self.fetch_page(offset + self.display_limit)
+
+    def render_history(self):
+        if not self.history_entries:
+            self.ids.log_label.text = "[size=20sp][b]No history found[/b][/size]"
             self.ids.log_label.markup = True
+            return
 
-        except Exception as e:
-            print(f"Error loading history: {e}")
-            self.ids.log_label.text = "Error loading history"
+        history_text = "[size=20sp][b]Calculation History:[/b]\n\n"
+        history_text += ''.join(self.history_entries)
+
+        # Add Load More button if more records exist
+        if self.has_more_records:
+            history_text += "[size=18sp][color=0000ff][ref=load_more][Load More...][/ref][/color][/size]"
+        else:
+            history_text += "[size=18sp][color=808080]No more records[/color][/size]"
+
+        self.ids.log_label.text = history_text
+        self.ids.log_label.markup = True
 
     def show_delete_confirmation(self, record_id):
         """Show confirmation dialog before deleting"""
@@ -159,6 +309,9 @@ class LogScreen(Screen):
             cursor = conn.cursor()
             cursor.execute('DELETE FROM calu_activity WHERE id = ?', (record_id,))
             conn.commit()
+
+            # Refill the ring buffer so the first page keeps coming from memory
+            self.manager.get_screen('main').warm_recent_calculations(cursor)
             conn.close()
 
             # Show success message
@@ -225,6 +378,9 @@ class MainScreen(Screen):
     current_num_system = StringProperty("limbu")
     font_name = StringProperty("assets/font/CODE2000.TTF")
     focused_field = StringProperty("input")
+    recent_limit = 30
+    # Collapse repeats of the same expression and result into one counted row
+    dedup_history = BooleanProperty(False)
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -236,6 +392,14 @@ class MainScreen(Screen):
         self.nepali_numbers = ['०', '१', '२', '३', '४', '५', '६', '७', '८', '९']
         self.limbu_numbers = ['᥆', '᥇', '᥈', '᥉', '᥊', '᥋', '᥌', '᥍', '᥎', '᥏']
 
+        # Key presses edit the buffer, the property and TextInput follow once per frame
+        self.input_buffer = InputBuffer()
+        self._input_trigger = Clock.create_trigger(self.sync_input)
+
+        # Newest calculations first, mirrored from calu_activity
+        self.recent_calculations = deque(maxlen=self.recent_limit)
+        self.recent_complete = False
+
         self.init_database()
         self.init_sound()
         Clock.schedule_once(self.update_hint_colors)  # Changed from _update_hint_colors to update_hint_colors
@@ -277,14 +441,111 @@ class MainScreen(Screen):
                     result TEXT,
                     timestamp_english TEXT,
                     timestamp_nepali TEXT,
-                    timestamp_limbu TEXT
+                    timestamp_limbu TEXT,
+                    repeat_count INTEGER NOT NULL DEFAULT 1,
+                    dedup_key TEXT,
+                    last_seen TEXT,
+                    seq INTEGER
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS app_settings (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
                 )
             ''')
+
+            # Databases created before repeat counting lack the new columns
+            cursor.execute('PRAGMA table_info(calu_activity)')
+            columns = {row[1] for row in cursor.fetchall()}
+            if 'repeat_count' not in columns:
+                cursor.execute('ALTER TABLE calu_activity ADD COLUMN repeat_count INTEGER NOT NULL DEFAULT 1')
+            if 'dedup_key' not in columns:
+                cursor.execute('ALTER TABLE calu_activity ADD COLUMN dedup_key TEXT')
+            if 'last_seen' not in columns:
+                cursor.execute('ALTER TABLE calu_activity ADD COLUMN last_seen TEXT')
+                # Older rows were last seen when they were saved
+                cursor.execute('''
+                    UPDATE calu_activity 
+                    SET last_seen = timestamp_english
+                ''')
+            if 'seq' not in columns:
+                cursor.execute('ALTER TABLE calu_activity ADD COLUMN seq INTEGER')
+                # Older rows keep their id order
+                cursor.execute('UPDATE calu_activity SET seq = id')
+
+            # Rows saved without dedup keep a NULL key, and NULLs never collide
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_calu_activity_dedup_key
+                ON calu_activity (dedup_key)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_calu_activity_seq
+                ON calu_activity (seq)
+            ''')
             conn.commit()
+            self.load_settings(cursor)
+            self.warm_recent_calculations(cursor)
             conn.close()
         except Exception as e:
             print(f"Database error: {e}")
 
+    def load_settings(self, cursor):
+        cursor.execute("SELECT value FROM app_settings WHERE key = 'dedup_history'")
+        row = cursor.fetchone()
+        self.dedup_history = bool(row) and row[0] == '1'
+
+    def toggle_dedup_history(self):
+        """Switch repeat counting on or off and remember the choice"""
+        self.dedup_history = not self.dedup_history
+        try:
+            conn = sqlite3.connect('kirat_cal.db')
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO app_settings (key, value)
+                VALUES ('dedup_history', ?)
+            ''', ('1' if self.dedup_history else '0',))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error saving settings: {e}")
+
+    def warm_recent_calculations(self, cursor):
+        """Fill the in-memory ring buffer with the newest rows"""
+        cursor.execute(f'''
+            SELECT {HISTORY_COLUMNS} FROM calu_activity 
+            ORDER BY {HISTORY_ORDER} 
+            LIMIT ?
+        ''', (self.recent_limit,))
+        records = cursor.fetchall()
+        self.recent_calculations.clear()
+        self.recent_calculations.extend(records)
+        # A short result means the whole table is in memory
+        self.recent_complete = len(records) < self.recent_limit
+
+    def recent_page(self, limit):
+        """Return (records, has_more) for the newest page, or None if the buffer can't answer"""
+        if self.recent_complete:
+            records = list(self.recent_calculations)
+            return records[:limit], len(records) > limit
+        if len(self.recent_calculations) >= limit:
+            # Rows beyond the buffer exist, so another page is certain
+            return list(self.recent_calculations)[:limit], True
+        return None
+
+    def remember_calculation(self, record):
+        """Put a saved row in the ring buffer"""
+        # A repeat moves to the front, just like its new seq moves it up in SQLite
+        if record[RECORD_REPEAT_COUNT] > 1:
+            for buffered in self.recent_calculations:
+                if buffered[RECORD_ID] == record[RECORD_ID]:
+                    self.recent_calculations.remove(buffered)
+                    break
+
+        if len(self.recent_calculations) == self.recent_limit:
+            self.recent_complete = False
+        self.recent_calculations.appendleft(record)
+
     def play_sound(self):
         if self.sound:
             try:
@@ -437,6 +698,7 @@ class MainScreen(Screen):
 
     def convert_existing_content(self, new_system):
         """Convert current input and result to new number system"""
+        self.sync_input()
         # Convert current input
         if self.current_input:
             # Convert to English first, then to new system
@@ -467,53 +729,84 @@ class MainScreen(Screen):
                 result.append(char)
         return ''.join(result)
 
+    def on_current_input(self, instance, value):
+        """Reload the buffer when current_input is set from outside the keypad"""
+        if value != self.input_buffer.text:
+            self._input_trigger.cancel()
+            self.input_buffer.set_text(value)
+
+    def sync_input(self, dt=None):
+        """Push the buffer to current_input and the TextInput cursor"""
+        self._input_trigger.cancel()
+        buffer = self.input_buffer
+        self.current_input = buffer.text
+        input_text = self.ids.get('input_text')
+        if input_text is not None and input_text.text == buffer.text:
+            input_text.cursor = input_text.get_cursor_from_index(buffer.cursor)
+
+    def pick_up_cursor(self):
+        """Take the cursor position from the TextInput if it is showing the buffer"""
+        input_text = self.ids.get('input_text')
+        if input_text is not None and input_text.text == self.input_buffer.text:
+            self.input_buffer.set_cursor(input_text.cursor_index())
+
     def on_button_press(self, button_text):
         self.set_focus("input")
+        buffer = self.input_buffer
 
         if button_text == "AC":
-            self.current_input = ""
+            buffer.clear()
+            self.sync_input()
             self.current_result = "0"
             self.last_was_operator = False
             return
 
+        if not self._input_trigger.is_triggered:
+            self.pick_up_cursor()
+
         if button_text == "DEL":
-            if self.current_input:
-                self.current_input = self.current_input[1:]
+            if buffer.delete_first():
+                self._input_trigger()
             return
 
         if button_text == "⌫":
-            if self.current_input:
-                self.current_input = self.current_input[:-1]
+            if buffer.backspace():
+                self._input_trigger()
             return
 
         if button_text == "=":
+            self.sync_input()
             self.calculate_result()
             return
 
         if button_text == "%":
-            self.current_input += button_text
+            buffer.insert(button_text)
+            self.sync_input()
             self.calculate_percentage()
             return
 
         # If we have a result and user presses an operator, start new calculation with result
-        if button_text in self.operators and not self.current_input and self.current_result != "0":
+        if button_text in self.operators and not len(buffer) and self.current_result != "0":
             # Convert result back to english for calculation
             english_result = self.convert_to_english(self.current_result)
-            self.current_input = english_result + button_text
+            buffer.set_text(english_result + button_text)
+            self._input_trigger()
             self.last_was_operator = True
             return
 
         if button_text in self.operators:
-            if self.current_input and self.last_was_operator:
-                self.current_input = self.current_input[:-1] + button_text
+            if len(buffer) and self.last_was_operator and buffer.token_before_cursor() in self.operators:
+                buffer.replace_before_cursor(button_text)
+                self._input_trigger()
                 return
-            elif not self.current_input:
+            elif not len(buffer):
                 return
             self.last_was_operator = True
         else:
             self.last_was_operator = False
 
-        self.current_input += button_text
+        buffer.insert(button_text)
+        self._input_trigger()
 
     def convert_timestamp(self, timestamp_str, number_system):
         if number_system == "english":
@@ -533,9 +826,14 @@ class MainScreen(Screen):
                 converted.append(char)
         return ''.join(converted)
 
+    def dedup_key(self, expression, result):
+        """Canonical form of a calculation, the same in every number system"""
+        return ''.join(str(int(c)) if c.isdecimal() else c for c in f"{expression}={result}")
+
     def save_calculation(self, expression, result):
         try:
             timestamp = datetime.now().strftime('%Y-%m-%d | %H:%M:%S')
+            last_seen = timestamp
 
             timestamp_english = timestamp
             timestamp_nepali = self.convert_timestamp(timestamp, "nepali")
@@ -544,23 +842,69 @@ class MainScreen(Screen):
             conn = sqlite3.connect('kirat_cal.db')
             cursor = conn.cursor()
 
-            cursor.execute('''
+            if self.dedup_history:
+                record = self.upsert_calculation(cursor, expression, result, timestamp_english,
+                                                 timestamp_nepali, timestamp_limbu, last_seen)
+                conn.commit()
+                conn.close()
+                self.remember_calculation(record)
+                return
+
+            cursor.execute(f'''
                 INSERT INTO calu_activity 
-                (expression, result, timestamp_english, timestamp_nepali, timestamp_limbu)
-                VALUES (?, ?, ?, ?, ?)
+                (expression, result, timestamp_english, timestamp_nepali, timestamp_limbu, last_seen, seq)
+                VALUES (?, ?, ?, ?, ?, ?, {NEXT_SEQ})
             ''', (
                 expression,
                 result,
                 timestamp_english,
                 timestamp_nepali,
-                timestamp_limbu
+                timestamp_limbu,
+                last_seen
             ))
+            record_id = cursor.lastrowid
 
             conn.commit()
             conn.close()
+
+            self.remember_calculation((
+                record_id,
+                expression,
+                result,
+                timestamp_english,
+                timestamp_nepali,
+                timestamp_limbu,
+                1,
+                last_seen
+            ))
         except Exception as e:
             print(f"Error saving calculation: {e}")
 
+    def upsert_calculation(self, cursor, expression, result, timestamp_english,
+                           timestamp_nepali, timestamp_limbu, last_seen):
+        """Insert a calculation or bump the count and last-seen time of its existing row"""
+        key = self.dedup_key(expression, result)
+        # The timestamp columns keep the first time the calculation was seen
+        cursor.execute(f'''
+            INSERT INTO calu_activity 
+            (expression, result, timestamp_english, timestamp_nepali, timestamp_limbu, last_seen, dedup_key, seq)
+            VALUES (?, ?, ?, ?, ?, ?, ?, {NEXT_SEQ})
+            ON CONFLICT (dedup_key) DO UPDATE SET
+                repeat_count = repeat_count + 1,
+                last_seen = excluded.last_seen,
+                seq = excluded.seq
+        ''', (
+            expression,
+            result,
+            timestamp_english,
+            timestamp_nepali,
+            timestamp_limbu,
+            last_seen,
+            key
+        ))
+        cursor.execute(f'SELECT {HISTORY_COLUMNS} FROM calu_activity WHERE dedup_key = ?', (key,))
+        return cursor.fetchone()
+
     def calculate_result(self):
         try:
             if not self.current_input: